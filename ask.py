@@ -5,17 +5,25 @@ Supports piping, interactive chat, JSON output, and conversation history.
 """
 import sys
 import json
-import argparse
-import urllib.request
-import urllib.error
+import http.client
+import socket
+import select
+import urllib.parse
 import os
-import re
 import io
+import time
+import contextlib
+import collections
+import functools
+import threading
 from pathlib import Path
-from datetime import datetime
+from types import SimpleNamespace
+
+# Asked once; agent mode, colors and the stream writer all key off it
+STDOUT_IS_TTY = sys.stdout.isatty()
 
 # Agent mode: strip emoji/unicode for clean piped output
-AGENT_MODE = os.getenv("ASK_AGENT_MODE", "").lower() in ("1", "true", "yes") or not sys.stdout.isatty()
+AGENT_MODE = os.getenv("ASK_AGENT_MODE", "").lower() in ("1", "true", "yes") or not STDOUT_IS_TTY
 
 # Fix Windows console encoding for emoji/unicode
 if sys.platform == 'win32':
@@ -27,52 +35,520 @@ if sys.platform == 'win32':
     except Exception:
         pass  # Fallback to default encoding
 
+# Agent mode strips emoji and other non-ASCII. Letting stdout's own encoder
+# drop them costs nothing extra, where stripping in safe_print meant an
+# encode/decode copy of every string before print encoded it again.
+_STRIP_IN_PRINT = False
+if AGENT_MODE:
+    try:
+        sys.stdout.reconfigure(encoding='ascii', errors='ignore')
+    except (AttributeError, ValueError):
+        _STRIP_IN_PRINT = True  # Not a reconfigurable text stream
+
 def safe_print(text, end='\n', flush=False):
     """Print with encoding safety for agents/piped output"""
-    if AGENT_MODE:
-        # Strip emoji and problematic unicode for agent consumption
+    if _STRIP_IN_PRINT:
         text = text.encode('ascii', errors='ignore').decode('ascii')
     try:
         print(text, end=end, flush=flush)
     except UnicodeEncodeError:
-        # Last resort: strip to ASCII
-        print(text.encode('ascii', errors='ignore').decode('ascii'), end=end, flush=flush)
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+        # The console can't encode some character: write bytes ourselves with
+        # replacement rather than swapping out the std streams
+        buffer = getattr(sys.stdout, "buffer", None)
+        if buffer is None:
+            print(text.encode('ascii', errors='ignore').decode('ascii'), end=end, flush=flush)
+            return
+        sys.stdout.flush()
+        buffer.write((text + end).encode(sys.stdout.encoding or 'utf-8', errors='replace'))
+        if flush:
+            buffer.flush()
 
-# Try readline for better input (Unix) or pyreadline3 (Windows)
+# Prefer orjson (C-backed, parses bytes directly) when installed
 try:
-    import readline
+    import orjson
 except ImportError:
+    orjson = None
+
+if orjson:
+    json_loads = orjson.loads
+
+    def json_dumps(obj, indent=False):
+        """Serialize to UTF-8 JSON bytes"""
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # orjson rejects lone surrogates (undecodable input() bytes under
+            # surrogateescape); the stdlib escapes them as \udcXX
+            if indent:
+                return json.dumps(obj, indent=2).encode('ascii')
+            return json.dumps(obj, separators=(',', ':')).encode('ascii')
+else:
+    json_loads = json.loads
+    # Reused compact encoder: no per-call encoder setup, no padding after separators
+    _json_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+    def json_dumps(obj, indent=False):
+        """Serialize to UTF-8 JSON bytes"""
+        if indent:
+            return json.dumps(obj, indent=2).encode('utf-8')
+        try:
+            return _json_encode(obj).encode('utf-8')
+        except UnicodeEncodeError:
+            # Lone surrogates can't be written as UTF-8; escaped ASCII output can
+            return json.dumps(obj, separators=(',', ':')).encode('ascii')
+
+def _env_int(name, default):
+    """Read a non-negative integer setting from the environment, warning on junk"""
+    value = os.getenv(name)
+    if value is None:
+        return default
     try:
-        import pyreadline3 as readline
-    except ImportError:
-        readline = None  # Graceful degradation
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        sys.stderr.write(f"Warning: ignoring {name}={value!r} (expected a whole number >= 0), using {default}\n")
+        return default
+    return number
 
 # Configuration
 DEFAULT_MODEL = os.getenv("ASK_MODEL", "qwen3-coder-next")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 HISTORY_DIR = Path.home() / ".ask_history"
 MAX_HISTORY_SESSIONS = 50
+SAFE_NAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-")
+MODELS_CACHE = HISTORY_DIR / ".models_cache.json"  # stamped with the OLLAMA_HOST it came from
+MODELS_CACHE_TTL = _env_int("ASK_MODELS_TTL", 3600)  # seconds; 0 disables the cache
+KEEP_ALIVE = os.getenv("ASK_KEEP_ALIVE", "10m")  # how long Ollama keeps the model loaded between requests
+MAX_TURNS = _env_int("ASK_MAX_TURNS", 20)  # past exchanges sent per chat request; 0 sends all
+
+_ColorSet = collections.namedtuple("Colors", "CYAN GREEN YELLOW RED DIM BOLD RESET")
+
+def _make_colors(enabled):
+    """Return the ANSI color codes, or empty strings when colors are off"""
+    if not enabled:
+        return _ColorSet("", "", "", "", "", "", "")
+    return _ColorSet("\033[96m", "\033[92m", "\033[93m", "\033[91m", "\033[2m", "\033[1m", "\033[0m")
 
 # ANSI colors (disabled on Windows without colorama or if NO_COLOR set)
-COLORS_ENABLED = sys.stdout.isatty() and not os.getenv("NO_COLOR")
-class Colors:
-    CYAN = "\033[96m" if COLORS_ENABLED else ""
-    GREEN = "\033[92m" if COLORS_ENABLED else ""
-    YELLOW = "\033[93m" if COLORS_ENABLED else ""
-    RED = "\033[91m" if COLORS_ENABLED else ""
-    DIM = "\033[2m" if COLORS_ENABLED else ""
-    BOLD = "\033[1m" if COLORS_ENABLED else ""
-    RESET = "\033[0m" if COLORS_ENABLED else ""
+COLORS_ENABLED = STDOUT_IS_TTY and not os.getenv("NO_COLOR")
+Colors = _make_colors(COLORS_ENABLED)
+
+# Thinking is shown dimmed on a color terminal and hidden otherwise; the
+# markers are resolved here so the streaming loop needs no color checks.
+SHOW_THINKING = COLORS_ENABLED and not AGENT_MODE
+THINK_OPEN = f"{Colors.DIM}[thinking] " if SHOW_THINKING else ""
+THINK_CLOSE = f"{Colors.RESET}\n" if SHOW_THINKING else ""
+
+
+def _discard(text):
+    pass
+
+
+def read_body(response):
+    """Read a whole response body, decompressing it if the server gzipped it"""
+    raw = response.read()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        import gzip  # Only whole (non-streamed) replies are compressed
+        raw = gzip.decompress(raw)
+    return raw
+
+
+# Read size for streamed responses; 64 KiB keeps syscalls low without holding back tokens
+STREAM_READ_SIZE = 65536
+
+
+def _iter_lines(response, idle=None):
+    """Yield the non-empty lines of a streamed NDJSON response as raw bytes.
+
+    Once the lines read so far are used up, idle(ready) is called before the
+    next read; ready(timeout) tells whether more body bytes are at hand
+    within timeout seconds. Only responses with body_ready() support this.
+    """
+    ready = getattr(response, "body_ready", None)
+    if ready is None:
+        idle = None
+    buf = bytearray()
+    while True:
+        if idle is not None:
+            idle(ready)
+        # read1() returns as soon as data is available; read(n) would block on
+        # a chunked body until n bytes arrived and stall the stream.
+        chunk = response.read1(STREAM_READ_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+        # Scan the buffer for record boundaries, then drop the consumed
+        # prefix once per read rather than re-slicing per line
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl == -1:
+                break
+            if nl > start:
+                yield buf[start:nl]
+            start = nl + 1
+        del buf[:start]
+    if buf.strip():
+        yield buf
+
+
+def _string_end(line, start):
+    """Return the index of the quote closing the JSON string body at start, or -1"""
+    end = line.find(b'"', start)
+    while end != -1:
+        # A quote preceded by an odd run of backslashes is escaped
+        k = end
+        while k > start and line[k - 1] == 0x5C:
+            k -= 1
+        if (end - k) % 2 == 0:
+            return end
+        end = line.find(b'"', end + 1)
+    return -1
+
+
+DONE_MARKER = b'"done":true'
+
+
+def _iter_stream(response, field, idle=None):
+    """Yield (content, record) for each record of a streamed NDJSON response.
+
+    Token records in Ollama's compact layout have just the `field` string
+    sliced out of the raw line, with record None. The final record, and any
+    line that doesn't fit the fast path, is fully parsed and yielded as
+    (None, record). Malformed lines are skipped. idle is passed to _iter_lines.
+    """
+    marker = b'"' + field.encode() + b'":"'
+    for line in _iter_lines(response, idle):
+        i = line.find(marker)
+        if i != -1 and DONE_MARKER not in line:
+            start = i + len(marker)
+            end = _string_end(line, start)
+            if end != -1:
+                raw = line[start:end]
+                try:
+                    # Decode only the string itself; escapes (newlines, Go's
+                    # \u003c for "<") still go through the JSON parser
+                    content = json_loads(line[start - 1:end + 1]) if b"\\" in raw else raw.decode('utf-8')
+                except ValueError:
+                    pass
+                else:
+                    yield content, None
+                    continue
+        try:
+            yield None, json_loads(line)
+        except ValueError:
+            pass
+
+
+class OllamaResponse(http.client.HTTPResponse):
+    """HTTPResponse that can tell whether more body bytes are waiting"""
+
+    def __init__(self, sock, *args, **kwargs):
+        super().__init__(sock, *args, **kwargs)
+        self.sock = sock
+
+    def body_ready(self, timeout):
+        """Whether body bytes are already buffered or arrive within timeout seconds"""
+        if self.fp is None:
+            return True  # Closed; let the next read report it
+        # A non-blocking peek returns what's buffered (or can be read right
+        # now) instead of waiting on the socket
+        saved = self.sock.gettimeout()
+        self.sock.settimeout(0)
+        try:
+            buffered = self.fp.peek(1)
+        except OSError:
+            buffered = b""  # Nothing to read yet (TLS reports it as an error)
+        finally:
+            self.sock.settimeout(saved)
+        # A fully read chunk still owes its trailing CRLF, which says nothing
+        # about whether the next record is on its way
+        owed = 2 if self.chunked and self.chunk_left == 0 else 0
+        if len(buffered) > owed:
+            return True
+        return bool(select.select([self.sock], [], [], timeout)[0])
+
+
+class _NoDelayMixin:
+    """Disable Nagle's algorithm so small chat requests aren't held for a delayed ACK"""
+
+    def connect(self):
+        super().connect()
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass  # Not every platform/socket type supports it
+
+
+class OllamaConnection(_NoDelayMixin, http.client.HTTPConnection):
+    response_class = OllamaResponse
+
+
+class OllamaHTTPSConnection(_NoDelayMixin, http.client.HTTPSConnection):
+    response_class = OllamaResponse
+
+
+class ThinkStream:
+    """Split streamed text into normal and <think> segments.
+
+    feed() yields (kind, text) pairs with kind "normal" or "think"; an empty
+    text marks the tag that switched into that kind. Text that might be the
+    start of a tag is held back until the next chunk, so tags split across
+    frames are still recognised.
+    """
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.in_think = False
+        self.pending = ""
+
+    def feed(self, text):
+        if self.pending:
+            text = self.pending + text
+            self.pending = ""
+        elif "<" not in text:
+            # Most frames are a word or two with no tag in sight: pass them
+            # straight through without scanning for either tag
+            if text:
+                yield ("think" if self.in_think else "normal"), text
+            return
+        pos = 0
+        while True:
+            kind = "think" if self.in_think else "normal"
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            idx = text.find(tag, pos)
+            if idx == -1:
+                break
+            if idx > pos:
+                yield kind, text[pos:idx]
+            self.in_think = not self.in_think
+            yield ("think" if self.in_think else "normal"), ""
+            pos = idx + len(tag)
+
+        # Hold back a trailing partial tag; both tags contain a single '<'
+        end = len(text)
+        lt = text.rfind("<", max(pos, end - len(tag) + 1))
+        if lt != -1 and tag.startswith(text[lt:]):
+            end = lt
+        if end > pos:
+            yield kind, text[pos:end]
+        self.pending = text[end:]
+
+    def flush(self):
+        """Emit any held-back text once the stream has ended"""
+        if self.pending:
+            yield ("think" if self.in_think else "normal"), self.pending
+            self.pending = ""
+
+
+class StreamWriter:
+    """Coalesce streamed tokens into fewer stdout writes.
+
+    On a terminal, pending text is flushed at most every FLUSH_INTERVAL
+    seconds or once MAX_PENDING characters pile up; the first token always
+    goes out immediately, and idle() flushes what is left once the stream
+    goes quiet for FLUSH_INTERVAL. Pipes flush per line, or once
+    MAX_PIPE_PENDING characters build up without a newline.
+    """
+    FLUSH_INTERVAL = 0.02
+    MAX_PENDING = 64
+    MAX_PIPE_PENDING = 4096
+
+    def __init__(self):
+        self.parts = []
+        self.pending = 0
+        self.last_flush = None
+        # Pick the flush policy once so write() doesn't re-test it per token
+        self.write = self._write_tty if STDOUT_IS_TTY else self._write_pipe
+        self.idle = self._flush_pending if STDOUT_IS_TTY else None
+        # Write encoded bytes straight to the binary layer, skipping the
+        # TextIOWrapper's per-call codec work; in agent mode stdout's
+        # encoding is ASCII, so the same encode strips non-ASCII
+        self.buffer = None if _STRIP_IN_PRINT else getattr(sys.stdout, "buffer", None)
+        self.encoding = sys.stdout.encoding or "utf-8"
+        self.errors = "ignore" if AGENT_MODE else "replace"
+
+    def _write_tty(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        self.pending += len(text)
+        if (self.last_flush is None or self.pending > self.MAX_PENDING
+                or time.monotonic() - self.last_flush > self.FLUSH_INTERVAL):
+            self.flush()
+
+    def _flush_pending(self, ready):
+        # The interval is only checked when a token arrives, so a pause in
+        # the stream would otherwise hold back the tail of the last burst.
+        # Tokens already buffered or arriving promptly keep batching.
+        if self.parts and not ready(self.FLUSH_INTERVAL):
+            self.flush()
+
+    def _write_pipe(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        self.pending += len(text)
+        if "\n" in text or self.pending >= self.MAX_PIPE_PENDING:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            text = "".join(self.parts)
+            if self.buffer is None:
+                safe_print(text, end="", flush=True)
+            else:
+                sys.stdout.flush()  # Keep ordering with earlier text-layer prints
+                self.buffer.write(text.encode(self.encoding, self.errors))
+                self.buffer.flush()
+            self.parts.clear()
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+
+@contextlib.contextmanager
+def _httpx_errors():
+    """Re-raise httpx transport errors as the socket errors chat() reports"""
+    import httpx
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise socket.timeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise ConnectionError(str(e)) from e
+
+
+class HttpxResponse:
+    """Adapt a streamed httpx response to the parts of http.client's interface used here"""
+
+    def __init__(self, response):
+        self._response = response
+        # httpx asks for gzip/deflate by default; iter_bytes() undoes whatever
+        # encoding the server (or a proxy) applied, so the body handed out is
+        # plain and its Content-Encoding no longer applies to read_body()
+        self._chunks = response.iter_bytes()
+        self.status = response.status_code
+        self.reason = response.reason_phrase
+        self.headers = response.headers.copy()
+        self.headers.pop("content-encoding", None)
+
+    def read1(self, amt=-1):
+        with _httpx_errors():
+            return next(self._chunks, b"")
+
+    def read(self):
+        with _httpx_errors():
+            data = b"".join(self._chunks)
+        self._response.close()
+        return data
+
+
+def _http2_available():
+    """HTTP/2 needs httpx plus its optional h2 dependency"""
+    try:
+        import httpx
+        import h2
+    except ImportError:
+        return False
+    return True
+
+
+# A single kept-alive connection to OLLAMA_HOST is shared by every request in
+# the process (chat turns across sessions, model listing), so the TCP/TLS
+# handshake is paid once. It is opened lazily on first use.
+_OLLAMA_URL = urllib.parse.urlsplit(OLLAMA_HOST)
+_connection = None
+
+
+def _get_connection():
+    """Return the shared connection to Ollama, creating it on first use"""
+    global _connection
+    if _connection is None:
+        https = _OLLAMA_URL.scheme == "https"
+        # HTTP/2 is only negotiated over TLS, so a plain-HTTP Ollama stays on http.client
+        if https and _http2_available():
+            import httpx
+            _connection = httpx.Client(http2=True, base_url=OLLAMA_HOST, timeout=300.0)
+        else:
+            conn_class = OllamaHTTPSConnection if https else OllamaConnection
+            _connection = conn_class(_OLLAMA_URL.hostname or "localhost",
+                                     _OLLAMA_URL.port or (443 if https else 11434),
+                                     timeout=300, blocksize=STREAM_READ_SIZE)
+    return _connection
+
+
+def close_connection():
+    """Close the shared connection; the next request opens a fresh one"""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def preconnect():
+    """Open the connection ahead of the first request; failures surface on that request"""
+    conn = _get_connection()
+    if isinstance(conn, http.client.HTTPConnection) and conn.sock is None:
+        try:
+            conn.connect()
+        except OSError:
+            close_connection()
+
+
+def ollama_request(method, path, body=None, headers=None, timeout=300):
+    """Send a request on the shared connection, reconnecting once if it went stale"""
+    headers = headers or {}
+    # Bodies always go out as one bytes object with a Content-Length, never
+    # chunked: http.client streams file-likes and iterables with chunked
+    # encoding, and httpx treats anything but bytes as an iterable body
+    if body is not None and type(body) is not bytes:
+        body = bytes(body)
+    for attempt in range(2):
+        conn = _get_connection()
+        if not isinstance(conn, http.client.HTTPConnection):
+            try:
+                with _httpx_errors():
+                    request = conn.build_request(method, path, content=body, headers=headers, timeout=timeout)
+                    return HttpxResponse(conn.send(request, stream=True))
+            except BaseException:
+                close_connection()
+                raise
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn.getresponse()
+        except (http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+            # Server closed the idle keep-alive socket (RemoteDisconnected is both)
+            close_connection()
+            if attempt:
+                raise
+        except BaseException:
+            # Timeouts, Ctrl+C and the like leave the shared connection
+            # mid-request, where http.client refuses any further request
+            close_connection()
+            raise
 
 
 class ChatSession:
-    def __init__(self, model, system_prompt=None, num_ctx=None, temperature=None):
+    def __init__(self, model, system_prompt=None, num_ctx=None, temperature=None, keep_alive=None):
         self.model = model
         self.messages = []
         self.num_ctx = num_ctx
         self.temperature = temperature
+        # Ollama reads a bare number as seconds and a string as a duration ("10m")
+        if keep_alive and keep_alive.lstrip("-").isdigit():
+            keep_alive = int(keep_alive)
+        self.keep_alive = keep_alive if keep_alive != "" else None
         self.total_tokens = 0
+        # JSON bytes for a prefix of self.messages, so /api/chat requests only
+        # encode messages added since the last one; tied to the list object
+        # so a wholesale replacement (load_session) starts over
+        self._encoded = []
+        self._encoded_src = self.messages
         if system_prompt:
             self.messages.append({"role": "system", "content": system_prompt})
 
@@ -82,16 +558,38 @@ class ChatSession:
     def add_assistant_message(self, content):
         self.messages.append({"role": "assistant", "content": content})
 
+    def _head_len(self):
+        """1 if the history starts with a system prompt, else 0"""
+        return 1 if self.messages and self.messages[0]["role"] == "system" else 0
+
+    def _messages_json(self):
+        """Return the messages to send as a JSON array, encoding only messages not seen before.
+
+        With MAX_TURNS set, that is the system prompt plus the last MAX_TURNS
+        exchanges and the pending prompt; self.messages itself keeps everything.
+        """
+        if self._encoded_src is not self.messages:
+            self._encoded = []
+            self._encoded_src = self.messages
+        encoded = self._encoded
+        encoded.extend(json_dumps(m) for m in self.messages[len(encoded):])
+        if MAX_TURNS:
+            head = self._head_len()
+            keep = MAX_TURNS * 2 + 1
+            if len(encoded) - head > keep:
+                return b"[" + b",".join(encoded[:head] + encoded[-keep:]) + b"]"
+        return b"[" + b",".join(encoded) + b"]"
+
     def chat(self, stream=True, json_mode=False, thinking=False):
-        url = f"{OLLAMA_HOST}/api/chat"
         data = {
             "model": self.model,
-            "messages": self.messages,
             "stream": stream
-        }
+        }  # messages are spliced in below
         
         if json_mode:
             data["format"] = "json"
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
         
         options = {}
         if self.num_ctx:
@@ -105,180 +603,294 @@ class ChatSession:
         # but some custom reasoning models might use prompt tokens. 
         # DeepSeek-R1 style models put thinking in <think> tags naturally.
 
-        req = urllib.request.Request(
-            url, 
-            data=json.dumps(data).encode('utf-8'), 
-            headers={'Content-Type': 'application/json'}
-        )
+        payload = b"".join((json_dumps(data)[:-1], b',"messages":', self._messages_json(), b"}"))
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        if not stream:
+            # Whole replies compress well; streamed frames are too small to bother
+            headers['Accept-Encoding'] = 'gzip'
+
+        full_parts = []
+        thinking_parts = []
+        think = ThinkStream()
+        out = StreamWriter()
+        write = out.write
+        write_think = write if SHOW_THINKING else _discard
 
-        full_response = ""
-        thinking_content = ""
-        in_thinking = False
+        def emit(kind, text):
+            # Empty segments mark a <think> tag opening or closing
+            if kind == "think":
+                if text:
+                    thinking_parts.append(text)
+                    write_think(text)
+                else:
+                    write(THINK_OPEN)
+            elif text:
+                full_parts.append(text)
+                write(text)
+            else:
+                write(THINK_CLOSE)
         
         try:
-            with urllib.request.urlopen(req, timeout=300) as response:
-                if stream:
-                    for line in response:
-                        if line:
-                            try:
-                                body = json.loads(line.decode('utf-8'))
-                            except json.JSONDecodeError:
-                                continue
-                                
-                            if "message" in body:
-                                content = body["message"].get("content", "")
-                                
-                                # Handle thinking blocks (<think>...</think>)
-                                # We need to handle split tags across chunks too, but simple approach first
-                                
-                                # Check for start tag
-                                if "<think>" in content:
-                                    in_thinking = True
-                                    parts = content.split("<think>")
-                                    pre_think = parts[0]
-                                    post_think = parts[1]
-                                    
-                                    if pre_think:
-                                        safe_print(pre_think, end="", flush=True)
-                                        full_response += pre_think
-                                    
-                                    if COLORS_ENABLED and not AGENT_MODE:
-                                        safe_print(f"{Colors.DIM}[thinking] ", end="", flush=True)
-                                    
-                                    content = post_think # Process remainder as thinking
-
-                                # Check for end tag
-                                if "</think>" in content:
-                                    in_thinking = False
-                                    parts = content.split("</think>")
-                                    think_part = parts[0]
-                                    rest_part = parts[1] if len(parts) > 1 else ""
-                                    
-                                    thinking_content += think_part
-                                    if COLORS_ENABLED and not AGENT_MODE:
-                                        safe_print(f"{think_part}{Colors.RESET}\n", end="", flush=True)
-                                    
-                                    content = rest_part # Process remainder as normal content
-                                
-                                if in_thinking:
-                                    thinking_content += content
-                                    if COLORS_ENABLED and not AGENT_MODE:
-                                        safe_print(content, end="", flush=True)
-                                else:
-                                    safe_print(content, end="", flush=True)
-                                    full_response += content
-                                    
-                            if body.get("done", False):
-                                # Capture token stats
-                                if "eval_count" in body:
-                                    self.total_tokens += body.get("eval_count", 0)
-                                break
-                    safe_print("")  # Newline at end
-                else:
-                    body = json.loads(response.read().decode('utf-8'))
-                    full_response = body["message"]["content"]
-                    safe_print(full_response)
-            
+            response = ollama_request("POST", "/api/chat", payload, headers)
+            if response.status != 200:
+                detail = read_body(response)
+                try:
+                    detail = json_loads(detail).get("error", detail)
+                except (ValueError, AttributeError):
+                    detail = detail.decode('utf-8', errors='replace')
+                safe_print(f"\nError: Ollama returned HTTP {response.status}")
+                safe_print(f"Details: {detail}")
+                return None
+
+            if stream:
+                feed = think.feed
+                for content, body in _iter_stream(response, "content", out.idle):
+                    if body is not None:
+                        msg = body.get("message")
+                        content = msg.get("content") if msg else None
+                    if content:
+                        if think.pending or "<" in content:
+                            for kind, text in feed(content):
+                                emit(kind, text)
+                        elif think.in_think:
+                            thinking_parts.append(content)
+                            write_think(content)
+                        else:
+                            # The common case: plain answer text, no tag in reach
+                            full_parts.append(content)
+                            write(content)
+
+                    if body is not None and body.get("done"):
+                        # Capture token stats
+                        self.total_tokens += body.get("eval_count") or 0
+                        break
+                for kind, text in think.flush():
+                    emit(kind, text)
+                if think.in_think and SHOW_THINKING:
+                    out.write(Colors.RESET)
+                out.flush()
+                safe_print("")  # Newline at end
+                full_response = "".join(full_parts)
+            else:
+                body = json_loads(read_body(response))
+                full_response = body["message"]["content"]
+                safe_print(full_response)
+
+            # Drain what's left of the body so the socket can serve the next turn
+            response.read()
             self.add_assistant_message(full_response)
             return full_response
                 
-        except urllib.error.URLError as e:
+        except (TimeoutError, socket.timeout):
+            close_connection()
+            out.flush()
+            safe_print(f"\nError: Request timed out")
+            return None
+        except (OSError, http.client.HTTPException) as e:
+            close_connection()
+            out.flush()
             safe_print(f"\nError: Could not connect to Ollama at {OLLAMA_HOST}")
             safe_print(f"Details: {e}")
             safe_print(f"\nTip: Is Ollama running? Try: ollama serve")
             return None
-        except TimeoutError:
-            safe_print(f"\nError: Request timed out")
-            return None
         except KeyboardInterrupt:
+            # The response was abandoned mid-stream; the socket can't be reused
+            close_connection()
+            out.flush()
             safe_print(f"\n(Request cancelled)")
             return None
 
 
-def list_models():
+def fetch_models(refresh=False):
+    """Return the model list from /api/tags, cached on disk for MODELS_CACHE_TTL seconds"""
+    if not refresh:
+        try:
+            if time.time() - MODELS_CACHE.stat().st_mtime < MODELS_CACHE_TTL:
+                cached = json_loads(MODELS_CACHE.read_bytes())
+                if cached.get("host") == OLLAMA_HOST:
+                    return cached.get("models", [])
+        except (OSError, ValueError, AttributeError):
+            pass  # Missing or corrupt cache, fetch fresh
+
+    response = ollama_request("GET", "/api/tags", headers={'Accept-Encoding': 'gzip'}, timeout=10)
+    try:
+        raw = read_body(response)
+    except BaseException:
+        close_connection()  # An unread body would wedge the shared connection
+        raise
+    if response.status != 200:
+        raise OSError(f"HTTP Error {response.status}: {response.reason}")
+    models = json_loads(raw).get("models", [])
+
+    # Write atomically so a concurrent reader never sees a partial file
+    try:
+        HISTORY_DIR.mkdir(exist_ok=True)
+        tmp = MODELS_CACHE.with_suffix(".tmp")
+        tmp.write_bytes(json_dumps({"host": OLLAMA_HOST, "models": models}))
+        tmp.replace(MODELS_CACHE)
+    except OSError:
+        pass
+    return models
+
+
+def list_models(refresh=False):
     """List available Ollama models"""
-    url = f"{OLLAMA_HOST}/api/tags"
     try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            models = data.get("models", [])
-            if not models:
-                safe_print("No models found. Pull one with: ollama pull <model>")
-                return
-            
-            if not AGENT_MODE:
-                safe_print(f"{Colors.CYAN}Available models:{Colors.RESET}\n")
-            else:
-                safe_print("Available models:\n")
-            # Sort models by name
-            models.sort(key=lambda x: x['name'])
-            
-            for m in models:
-                name = m["name"]
-                size_gb = m.get("size", 0) / (1024**3)
-                modified = m.get("modified_at", "")[:10]
-                
-                # Check if it matches default
-                is_default = name == DEFAULT_MODEL or name.split(":")[0] == DEFAULT_MODEL.split(":")[0]
-                
-                if AGENT_MODE:
-                    # Plain output for agents
-                    marker = " (default)" if is_default else ""
-                    safe_print(f"  {name:<30} {size_gb:>5.1f}GB  {modified}{marker}")
-                else:
-                    marker = f" {Colors.YELLOW}(default){Colors.RESET}" if is_default else ""
-                    # Colorize size
-                    size_color = Colors.DIM
-                    if size_gb > 10: size_color = Colors.RED
-                    elif size_gb > 5: size_color = Colors.YELLOW
-                    elif size_gb < 1: size_color = Colors.GREEN
-                    safe_print(f"  {Colors.BOLD}{name:<30}{Colors.RESET} {size_color}{size_gb:>5.1f}GB{Colors.RESET}  {Colors.DIM}{modified}{Colors.RESET}{marker}")
+        models = fetch_models(refresh)
+        if not models:
+            safe_print("No models found. Pull one with: ollama pull <model>")
+            return
+        
+        if not AGENT_MODE:
+            safe_print(f"{Colors.CYAN}Available models:{Colors.RESET}\n")
+        else:
+            safe_print("Available models:\n")
+        # Sort models by name
+        models.sort(key=lambda x: x['name'])
+
+        # Resolve colors and mode once; the loop only fills in per-model fields
+        if AGENT_MODE:
+            line_fmt = "  {name:<30} {size:>5.1f}GB  {modified}{marker}"
+            default_marker = " (default)"
+        else:
+            line_fmt = (f"  {Colors.BOLD}{{name:<30}}{Colors.RESET} {{size_color}}{{size:>5.1f}}GB{Colors.RESET}"
+                        f"  {Colors.DIM}{{modified}}{Colors.RESET}{{marker}}")
+            default_marker = f" {Colors.YELLOW}(default){Colors.RESET}"
+        default_base = DEFAULT_MODEL.split(":")[0]
+
+        lines = []
+        for m in models:
+            name = m["name"]
+            size_gb = m.get("size", 0) / (1024**3)
+
+            # Check if it matches default
+            is_default = name == DEFAULT_MODEL or name.split(":")[0] == default_base
+
+            # Colorize size
+            size_color = Colors.DIM
+            if size_gb > 10: size_color = Colors.RED
+            elif size_gb > 5: size_color = Colors.YELLOW
+            elif size_gb < 1: size_color = Colors.GREEN
+            lines.append(line_fmt.format(
+                name=name, size=size_gb, size_color=size_color,
+                modified=m.get("modified_at", "")[:10],
+                marker=default_marker if is_default else ""))
+        safe_print("\n".join(lines))
     except Exception as e:
+        close_connection()  # A failed exchange may leave the socket mid-response
         safe_print(f"Error listing models: {e}")
 
 
+def _iter_sessions():
+    """Scan HISTORY_DIR once, returning (mtime, filename, path) per saved session."""
+    # DirEntry.stat() reuses what readdir already fetched where the OS allows
+    with os.scandir(HISTORY_DIR) as it:
+        return [(e.stat().st_mtime, e.name, e.path) for e in it
+                if e.name.endswith(".json") and not e.name.startswith(".")]
+
+
+_sessions_cache = None  # (history dir mtime_ns, listing)
+
+
+def _list_sessions():
+    """Return saved sessions as (mtime, filename, path) tuples, newest first.
+
+    The listing is cached against the history directory's own mtime, which
+    changes whenever a session file is created, replaced or removed. Coarse
+    filesystem timestamps can miss a change within the same tick, so this
+    process drops the cache itself whenever it writes or deletes a session.
+    """
+    global _sessions_cache
+    try:
+        dir_mtime = os.stat(HISTORY_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if _sessions_cache is not None and _sessions_cache[0] == dir_mtime:
+        return _sessions_cache[1]
+    sessions = _iter_sessions()
+    sessions.sort(reverse=True)
+    _sessions_cache = (dir_mtime, sessions)
+    return sessions
+
+
 def save_session(session, name=None):
     """Save conversation to history"""
+    global _sessions_cache
+    from datetime import datetime
+
     HISTORY_DIR.mkdir(exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     # Sanitize name
-    safe_name = re.sub(r'[^a-zA-Z0-9_-]', '', name) if name else timestamp
+    safe_name = "".join(c for c in name or "" if c in SAFE_NAME_CHARS) or timestamp
     filename = f"{safe_name}.json"
     
-    with open(HISTORY_DIR / filename, "w") as f:
-        json.dump({
-            "model": session.model,
-            "messages": session.messages,
-            "saved_at": datetime.now().isoformat()
-        }, f, indent=2)
+    payload = json_dumps({
+        "model": session.model,
+        "messages": session.messages,
+        "saved_at": datetime.now().isoformat()
+    }, indent=True)
+
+    # Serialize once, write with a single syscall, then swap into place so a
+    # crash mid-write never leaves a truncated session behind
+    path = HISTORY_DIR / filename
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    _sessions_cache = None
     
     print(f"{Colors.DIM}Session saved to {filename}{Colors.RESET}")
     
     # Cleanup old sessions
-    sessions = sorted(HISTORY_DIR.glob("*.json"), key=os.path.getmtime)
-    if len(sessions) > MAX_HISTORY_SESSIONS:
-        for old in sessions[:-MAX_HISTORY_SESSIONS]:
-            old.unlink()
+    stale = _list_sessions()[MAX_HISTORY_SESSIONS:]
+    if stale:
+        for _, _, old_path in stale:
+            try:
+                os.unlink(old_path)
+            except FileNotFoundError:
+                pass  # Already pruned by another ask process
+        _sessions_cache = None
 
 
-def load_session(name):
+def load_session(name, keep_alive=None):
     """Load a previous conversation"""
     path = HISTORY_DIR / f"{name}.json"
     if not path.exists():
         # Try partial match (most recent first)
-        matches = sorted(HISTORY_DIR.glob(f"*{name}*.json"), key=os.path.getmtime, reverse=True)
-        if matches:
-            path = matches[0]
+        match = next((p for _, fname, p in _list_sessions() if name in fname[:-5]), None)
+        if match:
+            path = Path(match)
         else:
             print(f"{Colors.RED}Session '{name}' not found{Colors.RESET}")
             return None
     
-    with open(path) as f:
-        data = json.load(f)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        # Listed, but removed since (e.g. pruned by another ask process)
+        print(f"{Colors.RED}Session '{name}' not found{Colors.RESET}")
+        return None
+    try:
+        try:
+            data = json_loads(raw)
+        except ValueError:
+            # orjson rejects the \udcXX escapes lone surrogates are saved
+            # as; the stdlib parser reads them back
+            data = json.loads(raw)
+        model, messages = data["model"], data["messages"]
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"{Colors.RED}Could not read session {path.name}: {e}{Colors.RESET}")
+        return None
     
-    session = ChatSession(data["model"])
-    session.messages = data["messages"]
+    session = ChatSession(model, keep_alive=keep_alive)
+    session.messages = messages
     print(f"{Colors.GREEN}Loaded session from {path.name} ({len(session.messages)} messages){Colors.RESET}")
     
     # Replay last few messages context
@@ -292,7 +904,45 @@ def load_session(name):
     return session
 
 
-def interactive_mode(model, system_prompt, json_mode, thinking=False, load_from=None):
+PROMPT = f"{Colors.GREEN}>>> {Colors.RESET}"
+CONTINUATION_PROMPT = f"{Colors.GREEN}... {Colors.RESET}"
+HELP_TEXT = f"""
+{Colors.CYAN}Commands:{Colors.RESET}
+  exit, quit, q     Exit the chat
+  clear             Clear conversation history
+  save [name]       Save session to file
+  load <name>       Load a previous session
+  history           List recent saved sessions
+  models            List available models
+  model <name>      Switch model
+  help              Show this help
+
+{Colors.CYAN}Tips:{Colors.RESET}
+  - Use Ctrl+C to cancel a response
+  - Pipe input: cat file.txt | ask "summarize"
+  - Set default model: export ASK_MODEL=llama3
+"""
+
+
+def _continues(line):
+    """Whether the line's last non-blank character is a backslash, without copying it"""
+    i = len(line) - 1
+    while i >= 0 and line[i].isspace():
+        i -= 1
+    return i >= 0 and line[i] == "\\"
+
+
+def interactive_mode(model, system_prompt, json_mode, thinking=False, load_from=None, keep_alive=None):
+    # Try readline for better input (Unix) or pyreadline3 (Windows); only
+    # interactive mode reads from the terminal, so one-shot runs skip it
+    try:
+        import readline
+    except ImportError:
+        try:
+            import pyreadline3 as readline
+        except ImportError:
+            readline = None  # Graceful degradation
+
     # Banner
     print(f"{Colors.CYAN}🤖 Interactive Chat with {Colors.BOLD}{model}{Colors.RESET}")
     print(f"{Colors.DIM}Type 'help' for commands, 'quit' to exit.{Colors.RESET}")
@@ -305,81 +955,105 @@ def interactive_mode(model, system_prompt, json_mode, thinking=False, load_from=
 
     session = None
     if load_from:
-        session = load_session(load_from)
+        session = load_session(load_from, keep_alive)
     
     if not session:
-        session = ChatSession(model, system_prompt)
+        session = ChatSession(model, system_prompt, keep_alive=keep_alive)
+
+    def prompt_for(name):
+        return f"{Colors.GREEN}[{name}] >>> {Colors.RESET}" if name else PROMPT
+
+    def do_clear(arg):
+        nonlocal session
+        session = ChatSession(model, system_prompt, keep_alive=keep_alive)
+        print(f"{Colors.YELLOW}🧹 History cleared.{Colors.RESET}")
+
+    def do_save(name):
+        nonlocal load_from, prompt_str
+        save_session(session, name or None)
+        if name:
+            # Switch context to saved name
+            load_from = name
+            prompt_str = prompt_for(name)
+
+    def do_load(name):
+        nonlocal session, load_from, prompt_str
+        loaded = load_session(name, keep_alive)
+        if loaded:
+            session = loaded
+            load_from = name
+            prompt_str = prompt_for(name)
+
+    def do_models(arg):
+        list_models()
+
+    def do_model(new_model):
+        nonlocal model
+        session.model = new_model
+        model = new_model
+        print(f"{Colors.YELLOW}Switched to model: {model}{Colors.RESET}")
+
+    def do_history(arg):
+        from datetime import datetime
+        print(f"{Colors.CYAN}Saved sessions:{Colors.RESET}")
+        for mtime, fname, _ in _list_sessions()[:10]:
+            print(f"  {fname[:-5]} ({datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')})")
+
+    def do_help(arg):
+        print(HELP_TEXT)
+
+    # name -> (handler, argument): None takes no argument, "?" an optional one, "+" a required one.
+    # Input that doesn't fit a command's argument shape is sent to the model as a prompt.
+    handlers = {
+        "clear": (do_clear, None),
+        "save": (do_save, "?"),
+        "load": (do_load, "+"),
+        "models": (do_models, None),
+        "model": (do_model, "+"),
+        "history": (do_history, None),
+        "help": (do_help, None),
+    }
+    exit_words = ('exit', 'quit', 'q')
+    longest_word = max(len(w) for w in (*handlers, *exit_words))
+    prompt_str = prompt_for(load_from)
 
     while True:
         try:
-            # Fancy prompt
-            prompt_str = f"{Colors.GREEN}>>> {Colors.RESET}"
-            if load_from:
-                prompt_str = f"{Colors.GREEN}[{load_from}] >>> {Colors.RESET}"
-                
             user_input = input(prompt_str)
-            cmd = user_input.lower().strip()
-            
-            if cmd in ('exit', 'quit', 'q'):
-                break
-            if cmd == 'clear':
-                session = ChatSession(model, system_prompt)
-                print(f"{Colors.YELLOW}🧹 History cleared.{Colors.RESET}")
+            if not user_input or user_input.isspace():
                 continue
-            if cmd.startswith('save'):
-                parts = cmd.split(maxsplit=1)
-                name = parts[1] if len(parts) > 1 else None
-                save_session(session, name)
-                if name: load_from = name # Switch context to saved name
-                continue
-            if cmd.startswith('load '):
-                name = cmd.split(maxsplit=1)[1]
-                loaded = load_session(name)
-                if loaded:
-                    session = loaded
-                    load_from = name
-                continue
-            if cmd == 'models':
-                list_models()
-                continue
-            if cmd.startswith('model '):
-                new_model = cmd.split(maxsplit=1)[1]
-                session.model = new_model
-                model = new_model
-                print(f"{Colors.YELLOW}Switched to model: {model}{Colors.RESET}")
-                continue
-            if cmd == 'history':
-                print(f"{Colors.CYAN}Saved sessions:{Colors.RESET}")
-                sessions = sorted(HISTORY_DIR.glob("*.json"), key=os.path.getmtime, reverse=True)
-                for s in sessions[:10]:
-                    print(f"  {s.stem} ({datetime.fromtimestamp(s.stat().st_mtime).strftime('%Y-%m-%d %H:%M')})")
-                continue
-                
-            if cmd == 'help':
-                print(f"""
-{Colors.CYAN}Commands:{Colors.RESET}
-  exit, quit, q     Exit the chat
-  clear             Clear conversation history
-  save [name]       Save session to file
-  load <name>       Load a previous session
-  history           List recent saved sessions
-  models            List available models
-  model <name>      Switch model
-  help              Show this help
+            # Pasted prompts can be huge, so only the first word is sliced out
+            # (and case-folded) to look for a command; the rest is copied only
+            # once it is known to be a command's argument
+            start = 0
+            while user_input[start].isspace():
+                start += 1
+            end = start
+            limit = min(len(user_input), start + longest_word + 1)
+            while end < limit and not user_input[end].isspace():
+                end += 1
+            first = user_input[start:end].lower()
 
-{Colors.CYAN}Tips:{Colors.RESET}
-  - Use Ctrl+C to cancel a response
-  - Pipe input: cat file.txt | ask "summarize"
-  - Set default model: export ASK_MODEL=llama3
-""")
-                continue
-            
-            if not user_input.strip():
-                continue
+            if first in exit_words or first in handlers:
+                arg = user_input[end:].strip()
+                if first in exit_words:
+                    if not arg:
+                        break
+                else:
+                    handler, arg_kind = handlers[first]
+                    if arg_kind == "?" or bool(arg) == (arg_kind == "+"):
+                        handler(arg)
+                        continue
             
             # Allow multiline input if ends with \
-            while user_input.strip().endswith('\\'):
-                user_input = user_input.rstrip('\\') + "\n" + input(f"{Colors.GREEN}... {Colors.RESET}")
+            if _continues(user_input):
+                # Collect the lines and join once, rather than re-copying and
+                # re-stripping the whole input on every continuation line
+                lines = [user_input]
+                while _continues(lines[-1]):
+                    lines[-1] = lines[-1].rstrip('\\')
+                    lines.append(input(CONTINUATION_PROMPT))
+                user_input = "\n".join(lines)
 
             session.add_user_message(user_input)
             session.chat(stream=True, json_mode=json_mode, thinking=thinking)
@@ -391,8 +1065,30 @@ def interactive_mode(model, system_prompt, json_mode, thinking=False, load_from=
             print("\nExiting...")
             break
 
+    close_connection()
 
-def main():
+
+def parse_args(argv):
+    """Parse command-line arguments.
+
+    A bare prompt (no option flags) is by far the most common invocation
+    from scripts, so it is handled without importing argparse.
+    """
+    if not any(arg.startswith("-") for arg in argv):
+        # Keep in sync with the defaults in _get_parser()
+        return SimpleNamespace(
+            prompt=argv, model=DEFAULT_MODEL, system=None, think=False, stream=True,
+            json=False, ctx=None, temp=None, load=None, list_models=False,
+            refresh_models=False, output=None, keep_alive=KEEP_ALIVE, version=False, debug=False,
+        )
+
+    return _get_parser().parse_args(argv)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_parser():
+    """Build the argument parser once per process"""
+    import argparse
     parser = argparse.ArgumentParser(
         description="Ask Ollama anything via CLI",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -416,11 +1112,17 @@ Examples:
     parser.add_argument("--temp", type=float, help="Temperature (0.0-2.0, default varies by model)")
     parser.add_argument("--load", metavar="NAME", help="Load a previous session")
     parser.add_argument("--list-models", action="store_true", help="List available models")
+    parser.add_argument("--refresh-models", action="store_true", help="Bypass the cached model list")
+    parser.add_argument("--keep-alive", default=KEEP_ALIVE, metavar="DURATION",
+                        help=f"How long Ollama keeps the model loaded, e.g. 30m or -1 for always (default: {KEEP_ALIVE})")
     parser.add_argument("-o", "--output", metavar="FILE", help="Write output to file (bypasses stdout encoding)")
     parser.add_argument("-v", "--version", action="store_true", help="Show version info")
     parser.add_argument("--debug", action="store_true", help="Show debug info on errors")
-    
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    args = parse_args(sys.argv[1:])
 
     # Handle --version
     if args.version:
@@ -431,35 +1133,41 @@ Examples:
 
     # Handle --list-models
     if args.list_models:
-        list_models()
+        list_models(refresh=args.refresh_models)
         sys.exit(0)
 
-    # Handle piped input
+    session = ChatSession(args.model, args.system, args.ctx, args.temp, args.keep_alive)
+
+    # Handle piped input, reading it on a thread while the connection to
+    # Ollama is set up so a large pipe doesn't delay the first token
     stdin_input = ""
     if not sys.stdin.isatty():
-        try:
-            stdin_input = sys.stdin.read().strip()
-        except Exception:
-            pass
+        chunks = []
+
+        def read_stdin():
+            try:
+                chunks.append(sys.stdin.buffer.read())
+            except Exception:
+                pass
+
+        reader = threading.Thread(target=read_stdin, daemon=True)
+        reader.start()
+        preconnect()
+        reader.join()
+        if chunks:
+            stdin_input = chunks[0].decode('utf-8', errors='replace').strip()
 
     # Determine mode
     prompt_text = " ".join(args.prompt)
     
     # If no prompt and no piped input -> Interactive Mode
     if not prompt_text and not stdin_input:
-        interactive_mode(args.model, args.system, args.json, args.think, args.load)
+        interactive_mode(args.model, args.system, args.json, args.think, args.load, args.keep_alive)
         sys.exit(0)
 
-    # One-shot mode
-    final_content = ""
-    if prompt_text:
-        final_content += prompt_text
-    if stdin_input:
-        if final_content:
-            final_content += "\n\nContext:\n"
-        final_content += stdin_input
+    # One-shot mode: one join, so a large piped input is copied only once
+    final_content = "\n\nContext:\n".join(part for part in (prompt_text, stdin_input) if part)
 
-    session = ChatSession(args.model, args.system, args.ctx, args.temp)
     session.add_user_message(final_content)
     
     # If output file specified, capture result and write to file
@@ -472,6 +1180,7 @@ Examples:
             safe_print(f"Output written to {args.output}")
     else:
         result = session.chat(stream=args.stream, json_mode=args.json, thinking=args.think)
+    close_connection()
     
     if result is None:
         sys.exit(1)
@@ -6,14 +6,50 @@ Designed for piped/non-interactive environments
 import sys
 import json
 import argparse
-import urllib.request
-import urllib.error
+import http.client
+import urllib.parse
 import os
 
 # Configuration
 DEFAULT_MODEL = os.getenv("ASK_MODEL", "gpt-oss:latest")
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 
+# Parsed once; the connection object is created here but only dials out on first request
+_URL = urllib.parse.urlsplit(OLLAMA_HOST)
+_HTTPS = _URL.scheme == "https"
+_HOST = _URL.hostname or "localhost"
+_PORT = _URL.port or (443 if _HTTPS else 11434)
+_HEADERS = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+
+_conn = (http.client.HTTPSConnection if _HTTPS else http.client.HTTPConnection)(_HOST, _PORT, timeout=300)
+
+def _request(method, path, body=None, headers=None, timeout=300):
+    """Send a request and return the response body, reusing the connection"""
+    # The one connection lives for the whole process: a kept-alive socket
+    # was opened with an earlier request's timeout, so update it as well
+    _conn.timeout = timeout
+    if _conn.sock is not None:
+        _conn.sock.settimeout(timeout)
+    for attempt in range(2):
+        try:
+            _conn.request(method, path, body=body, headers=headers or {})
+            resp = _conn.getresponse()
+            data = resp.read()
+            break
+        except (http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+            # Stale keep-alive socket: a closed connection redials on the next request
+            _conn.close()
+            if attempt:
+                raise
+        except Exception:
+            # Timeouts and the like leave the connection mid-request, where it
+            # would refuse every later request; reset it before giving up
+            _conn.close()
+            raise
+    if resp.status != 200:
+        raise OSError(f"HTTP Error {resp.status}: {resp.reason}")
+    return data
+
 def safe_output(text):
     """Output text safely, stripping problematic characters"""
     # Strip to ASCII for piped output compatibility
@@ -39,19 +75,14 @@ def ask(prompt, model=None, system=None, json_mode=False):
     if json_mode:
         data["format"] = "json"
     
-    req = urllib.request.Request(
-        f"{OLLAMA_HOST}/api/chat",
-        data=json.dumps(data).encode('utf-8'),
-        headers={'Content-Type': 'application/json'}
-    )
-    
     try:
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            body = json.loads(resp.read().decode('utf-8'))
-            return body["message"]["content"]
-    except urllib.error.URLError as e:
-        sys.stderr.write(f"Error: {e}\n")
-        return None
+        resp = _request(
+            "POST", "/api/chat",
+            body=json.dumps(data).encode('utf-8'),
+            headers=_HEADERS
+        )
+        body = json.loads(resp)
+        return body["message"]["content"]
     except Exception as e:
         sys.stderr.write(f"Error: {e}\n")
         return None
@@ -59,12 +90,11 @@ def ask(prompt, model=None, system=None, json_mode=False):
 def list_models():
     """List available models"""
     try:
-        with urllib.request.urlopen(f"{OLLAMA_HOST}/api/tags", timeout=10) as resp:
-            data = json.loads(resp.read().decode('utf-8'))
-            for m in sorted(data.get("models", []), key=lambda x: x['name']):
-                name = m['name']
-                size = m.get('size', 0) / (1024**3)
-                safe_output(f"  {name:<35} {size:>5.1f}GB")
+        data = json.loads(_request("GET", "/api/tags", timeout=10))
+        for m in sorted(data.get("models", []), key=lambda x: x['name']):
+            name = m['name']
+            size = m.get('size', 0) / (1024**3)
+            safe_output(f"  {name:<35} {size:>5.1f}GB")
     except Exception as e:
         sys.stderr.write(f"Error: {e}\n")
 